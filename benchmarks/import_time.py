@@ -0,0 +1,62 @@
+"""
+Measure the import time of elastictools and check that heavy modules are only imported on first use.
+Usage:
+    python benchmarks/import_time.py [--runs 20]
+Exit with status 1 if a lazily imported module is loaded by a plain import.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = [
+    ('python startup', 'pass'),
+    ('import elastictools', 'import elastictools'),
+    ('IndexTools', 'from elastictools.indextools import IndexTools'),
+    ('DocTools', 'from elastictools.doctools import DocTools'),
+]
+
+# modules that must not be loaded by importing DocTools, unless `import elasticsearch` already loads them
+# (elasticsearch-py >= 7.8 imports asyncio, hence concurrent.futures)
+LAZY_MODULES = ['jinja2', 'elasticsearch.helpers', 'csv', 'concurrent.futures',
+                'elastictools.bulkwriter', 'elastictools.getcoalescer']
+
+
+def loaded_modules(code):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    code += '; import sys; print(" ".join(m for m in {!r} if m in sys.modules))'.format(LAZY_MODULES)
+    return set(subprocess.run([sys.executable, '-c', code], env=env, check=True,
+                              stdout=subprocess.PIPE, universal_newlines=True).stdout.split())
+
+
+def run(code):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], env=env, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    for name, code in CASES:
+        times = [run(code) for _ in range(args.runs)]
+        print('{:<20} median {:7.1f} ms   min {:7.1f} ms'.format(name, statistics.median(times) * 1000,
+                                                                min(times) * 1000))
+
+    loaded = loaded_modules('from elastictools.doctools import DocTools') - loaded_modules('import elasticsearch')
+    if loaded:
+        print('eagerly imported: {}'.format(', '.join(sorted(loaded))))
+        return 1
+    print('no lazily imported module loaded')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,25 @@
-from . import indextools
-from . import doctools
+import importlib
 
+# submodules are imported on first attribute access, so `import elastictools` stays cheap
 __all__ = [
     'indextools',
-    'doctools'
-]
\ No newline at end of file
+    'doctools',
+    'querycache',
+    'bulkwriter',
+    'getcoalescer',
+    'bulksink',
+    'rollover',
+    'cli'
+]
+
+
+def __getattr__(name):
+    if name in __all__:
+        module = importlib.import_module('.' + name, __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,93 @@
+import json
+
+
+class BulkSink:
+    def __init__(self, callback=None):
+        """
+        Receive the per item results of DocTools.bulk: successes are only counted,
+        failed items are passed, with their original action, to `on_error`
+        :param callback: called with (action, item) for every failed item
+        """
+        self.callback = callback
+        self.succeeded = 0
+        self.failed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add(self, ok, action, item):
+        """
+        Record the result of a bulk item
+        :param ok: True if the item succeeded
+        :param action: the original action
+        :param item: the bulk item result, ex.: {'index': {'_id': ..., 'status': 400, 'error': ...}}
+        :return:
+        """
+        if ok:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+            self.on_error(action, item)
+
+    def on_error(self, action, item):
+        """
+        Handle a failed item, override in sub classes
+        :param action: the original action
+        :param item: the bulk item result
+        :return:
+        """
+        if self.callback:
+            self.callback(action, item)
+
+    def close(self):
+        pass
+
+
+class NdjsonSink(BulkSink):
+    def __init__(self, filename, mode='a', callback=None):
+        """
+        Dead letter file: write every failed item as a NDJSON line {"action": ..., "error": ...}
+        :param filename:
+        :param mode: 'a' to append to an existing file, 'w' to overwrite it
+        :param callback: also called with (action, item) for every failed item
+        """
+        super().__init__(callback)
+        self.filename = filename
+        self._file = open(filename, mode)
+
+    def on_error(self, action, item):
+        self._file.write(json.dumps({'action': action, 'error': item}, default=str))
+        self._file.write('\n')
+        super().on_error(action, item)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    @staticmethod
+    def read_actions(filename):
+        """
+        Read the actions of a dead letter file, lazily
+        :param filename:
+        :return: generator of actions
+        """
+        with open(filename) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)['action']
+
+    def replay(self, doctool, index_name, sink=None, **kwargs):
+        """
+        Re-feed the dead letters into DocTools.bulk
+        :param doctool: a DocTools instance
+        :param index_name:
+        :param sink: sink for the replayed items, should not write into this file
+        :param kwargs: passed to DocTools.bulk
+        :return: (succeeded, failed) if sink, otherwise DocTools.bulk result
+        """
+        self.close()
+        return doctool.bulk(index_name, NdjsonSink.read_actions(self.filename), sink=sink, **kwargs)
@@ -0,0 +1,276 @@
+import time
+import threading
+from concurrent.futures import Future
+import elasticsearch.helpers
+
+
+class _Pending:
+    __slots__ = ('action', 'size', 'futures')
+
+    def __init__(self, action, size, future):
+        self.action = action
+        self.size = size
+        self.futures = [future]
+
+
+class BulkWriter:
+    def __init__(self, doctool, index_name=None, max_actions=500, max_bytes=5 * 1024 * 1024, max_age=1.0,
+                 max_pending=None, doctype=None, check_index_existed=True, **kwargs):
+        """
+        Write-behind buffer that coalesces single document index/update/delete calls into bulk requests.
+        Writes to the same `_id` in the same window are merged, so only the last state is sent.
+        A background thread flushes the buffer when it holds `max_actions` actions, `max_bytes` bytes,
+        or when its oldest action is `max_age` seconds old.
+        :param doctool: a DocTools instance
+        :param index_name: default index name
+        :param max_actions: flush when the buffer holds that many actions
+        :param max_bytes: flush when the buffer holds that many bytes of (serialized) documents
+        :param max_age: flush when the oldest buffered action is that old, in seconds,
+            None to flush on max_actions and max_bytes only
+        :param max_pending: block writers when the buffer holds that many actions, default 10 * max_actions
+        :param doctype:
+        :param check_index_existed: check (once per index) that the index exists before buffering writes
+        :param kwargs: passed to elasticsearch.helpers.streaming_bulk
+        """
+        if kwargs.get('max_retries') or not kwargs.get('yield_ok', True):
+            # item results must come back one per action, in order, to resolve the futures
+            raise ValueError('max_retries and yield_ok=False are not supported.')
+        if max_age is not None and max_age <= 0:
+            raise ValueError('max_age must be positive or None.')
+        self._doctool = doctool
+        self._es = doctool._es
+        # sizes are measured with the client serializer, which handles dates, decimals, ...
+        self._serializer = self._es.transport.serializer
+        self.index_name = index_name
+        self.max_actions = max_actions
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_pending = max_pending or 10 * max_actions
+        # fix for ES 7
+        self.doctype = doctype or '_doc'
+        self.check_index_existed = check_index_existed
+        self._kwargs = kwargs
+        self._checked_indices = set()
+        self._pending = {}
+        self._bytes = 0
+        self._oldest = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='elastictools-bulkwriter', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def index(self, body, id=None, index_name=None):
+        """
+        Buffer a create or update of a document
+        :param body: document source
+        :param id: if None, will generate, if not None, will replace the document if existed
+        :param index_name: if None, use the default index name
+        :return: a Future, resolved with the bulk item result once flushed
+        """
+        index_name = self._get_index_name(index_name)
+        action = {'_op_type': 'index', '_index': index_name, '_type': self.doctype, '_source': body}
+        if id is not None:
+            action['_id'] = id
+        return self._add(index_name, id, action, len(self._serializer.dumps(body)))
+
+    def update(self, id, doc=None, script=None, upsert=None, doc_as_upsert=False, index_name=None):
+        """
+        Buffer a partial update of a document
+        :param id:
+        :param doc: partial document
+        :param script: update script, updates with script are never merged
+        :param upsert: document to index if the document does not exist
+        :param doc_as_upsert: use `doc` as upsert document
+        :param index_name: if None, use the default index name
+        :return: a Future, resolved with the bulk item result once flushed
+        """
+        if doc is None and script is None:
+            raise ValueError('doc or script param missing.')
+        index_name = self._get_index_name(index_name)
+        action = {'_op_type': 'update', '_index': index_name, '_type': self.doctype, '_id': id}
+        if doc is not None:
+            action['doc'] = doc
+        if script is not None:
+            action['script'] = script
+        if upsert is not None:
+            action['upsert'] = upsert
+        if doc_as_upsert:
+            action['doc_as_upsert'] = True
+        return self._add(index_name, id, action, len(self._serializer.dumps([doc, script, upsert])))
+
+    def delete(self, id, index_name=None):
+        """
+        Buffer a delete of a document
+        :param id:
+        :param index_name: if None, use the default index name
+        :return: a Future, resolved with the bulk item result once flushed
+        """
+        index_name = self._get_index_name(index_name)
+        action = {'_op_type': 'delete', '_index': index_name, '_type': self.doctype, '_id': id}
+        return self._add(index_name, id, action, 0)
+
+    def flush(self):
+        """
+        Send all buffered actions now, wait for the bulk request to complete
+        :return: number of actions sent
+        """
+        with self._flush_lock:
+            with self._cond:
+                batch = list(self._pending.values())
+                self._pending = {}
+                self._bytes = 0
+                self._oldest = None
+                self._cond.notify_all()
+            if batch:
+                self._send(batch)
+            return len(batch)
+
+    def close(self):
+        """
+        Stop the background thread and flush the remaining actions
+        :return:
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.flush()
+
+    def _get_index_name(self, index_name):
+        index_name = index_name or self.index_name
+        if not index_name:
+            raise ValueError('index_name param missing.')
+        if self.check_index_existed and index_name not in self._checked_indices:
+            if not self._doctool.indextool().exists(index_name):
+                raise ValueError('index not existed: {}'.format(index_name))
+            self._checked_indices.add(index_name)
+        return index_name
+
+    def _add(self, index_name, id, action, size):
+        future = Future()
+        # documents with generated ids are never merged
+        key = (index_name, id) if id is not None else object()
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise ValueError('BulkWriter already closed.')
+                if len(self._pending) >= self.max_pending and key not in self._pending:
+                    self._cond.notify_all()
+                    self._cond.wait()
+                    continue
+                pending = self._pending.get(key)
+                if pending is None:
+                    self._pending[key] = _Pending(action, size, future)
+                    self._bytes += size
+                else:
+                    merged = BulkWriter._merge(pending.action, action)
+                    if merged is not None:
+                        self._bytes += size - pending.size
+                        pending.action = merged
+                        pending.size = size
+                        pending.futures.append(future)
+                if pending is None or merged is not None:
+                    if self._oldest is None:
+                        # wake up the flusher to wait for the max_age deadline
+                        self._oldest = time.monotonic()
+                        self._cond.notify_all()
+                    elif len(self._pending) >= self.max_actions or self._bytes >= self.max_bytes:
+                        self._cond.notify_all()
+                    return future
+            # the previous action on this id can not be merged, send it first to keep the order
+            self.flush()
+
+    @staticmethod
+    def _merge(previous, action):
+        """
+        Merge two actions on the same document into one, return None if they can not be merged
+        """
+        op_type = action['_op_type']
+        if op_type in ('index', 'delete'):
+            return action
+        if 'script' in action or 'upsert' in action:
+            return None
+        if previous['_op_type'] == 'index':
+            merged = dict(previous)
+            merged['_source'] = BulkWriter._merge_doc(previous['_source'], action['doc'])
+            return merged
+        if previous['_op_type'] == 'update':
+            if 'script' in previous or 'upsert' in previous:
+                return None
+            if previous.get('doc_as_upsert', False) != action.get('doc_as_upsert', False):
+                return None
+            merged = dict(previous)
+            merged['doc'] = BulkWriter._merge_doc(previous['doc'], action['doc'])
+            return merged
+        return None
+
+    @staticmethod
+    def _merge_doc(doc, partial):
+        """
+        Merge a partial document into a document, the way ElasticSearch does with objects
+        """
+        if not isinstance(doc, dict) or not isinstance(partial, dict):
+            return partial
+        merged = dict(doc)
+        for k, v in partial.items():
+            if isinstance(v, dict) and isinstance(merged.get(k), dict):
+                merged[k] = BulkWriter._merge_doc(merged[k], v)
+            else:
+                merged[k] = v
+        return merged
+
+    def _send(self, batch):
+        actions = [pending.action for pending in batch]
+        i = 0
+        try:
+            for ok, item in elasticsearch.helpers.streaming_bulk(self._es, actions, chunk_size=self.max_actions,
+                                                                 max_chunk_bytes=self.max_bytes,
+                                                                 raise_on_error=False, raise_on_exception=False,
+                                                                 **self._kwargs):
+                if ok:
+                    BulkWriter._resolve(batch[i].futures, item)
+                else:
+                    error = elasticsearch.helpers.BulkIndexError('1 document(s) failed to index.', [item])
+                    BulkWriter._resolve(batch[i].futures, exception=error)
+                i += 1
+        except Exception as e:
+            for pending in batch[i:]:
+                BulkWriter._resolve(pending.futures, exception=e)
+        finally:
+            self._doctool.invalidate_cache(list(set(action['_index'] for action in actions)))
+
+    @staticmethod
+    def _resolve(futures, result=None, exception=None):
+        for future in futures:
+            if future.done():
+                continue
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if len(self._pending) >= self.max_actions or self._bytes >= self.max_bytes:
+                        break
+                    if self._oldest is None or self.max_age is None:
+                        self._cond.wait()
+                        continue
+                    timeout = self._oldest + self.max_age - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self._cond.wait(timeout)
+                if self._closed:
+                    return
+            self.flush()
@@ -0,0 +1,159 @@
+"""
+Command line interface, ex.:
+    elastictools --url http://localhost:9200 dump index_a | elastictools load index_b
+Commands import only the modules they need, to keep start up fast.
+"""
+import argparse
+import json
+import os
+import sys
+
+DEFAULT_URL = 'http://localhost:9200'
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+def _open_output(path, compress):
+    if compress:
+        import gzip
+        if path and path != '-':
+            out = gzip.open(path, 'wb', compresslevel=compress)
+        else:
+            out = gzip.GzipFile(fileobj=sys.stdout.buffer, mode='wb', compresslevel=compress)
+    elif path and path != '-':
+        out = open(path, 'wb')
+    else:
+        out = sys.stdout.buffer
+    import io
+    return io.TextIOWrapper(out, encoding='utf-8', write_through=False)
+
+
+def _open_input(path):
+    if path and path != '-':
+        raw = open(path, 'rb')
+    else:
+        raw = sys.stdin.buffer
+    import io
+    if not hasattr(raw, 'peek'):
+        raw = io.BufferedReader(raw)
+    if raw.peek(2)[:2] == _GZIP_MAGIC:
+        import gzip
+        raw = gzip.GzipFile(fileobj=raw, mode='rb')
+    return io.TextIOWrapper(raw, encoding='utf-8')
+
+
+def _read_actions(stream, counter):
+    for line in stream:
+        line = line.strip()
+        if line:
+            counter[0] += 1
+            yield json.loads(line)
+
+
+def dump(args):
+    from elastictools.doctools import DocTools
+    doctool = DocTools.from_url(args.url)
+    query = json.loads(args.query) if args.query else None
+    out = _open_output(args.output, args.compress)
+    total = 0
+    try:
+        hits = doctool.scan(args.index, query=query, page_size=args.batch_size, slices=args.concurrency or 1,
+                            by_shard=args.by_shard, thread_count=args.concurrency)
+        for hit in hits:
+            if args.source_only:
+                doc = hit['_source']
+            else:
+                doc = {'_id': hit['_id'], '_source': hit['_source']}
+                if '_routing' in hit:
+                    doc['_routing'] = hit['_routing']
+            out.write(json.dumps(doc))
+            out.write('\n')
+            total += 1
+        out.close()
+    except BrokenPipeError:
+        # downstream command stopped reading, avoid another error while flushing stdout at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    print('dumped {} documents'.format(total), file=sys.stderr)
+    return 0
+
+
+def load(args):
+    from elastictools.doctools import DocTools
+    doctool = DocTools.from_url(args.url)
+    counter = [0]
+    sink = None
+    if args.dead_letter:
+        from elastictools.bulksink import NdjsonSink
+        sink = NdjsonSink(args.dead_letter)
+    with _open_input(args.input) as stream:
+        res = doctool.bulk(args.index, _read_actions(stream, counter), thread_count=args.concurrency,
+                           chunk_size=args.batch_size, check_index_existed=not args.no_check, sink=sink)
+    if sink is None:
+        print('loaded {} documents'.format(counter[0]), file=sys.stderr)
+        return 0
+    sink.close()
+    print('loaded {} documents, {} failed (see {})'.format(res[0], res[1], args.dead_letter), file=sys.stderr)
+    return 1 if res[1] else 0
+
+
+def clone(args):
+    from elastictools.indextools import IndexTools
+    indextool = IndexTools.from_url(args.url)
+    kwargs = {}
+    if args.concurrency > 1:
+        kwargs['slices'] = args.concurrency
+    res = indextool.clone(args.src_index, args.dest_index, size=args.size, overwrite=args.overwrite,
+                          wait_for_completion=args.wait, remote_host=args.remote_host, **kwargs)
+    print(json.dumps(res))
+    return 0
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(prog='elastictools', description='Useful tools to work with Elastic stack')
+    parser.add_argument('--url', default=os.environ.get('ELASTICTOOLS_URL', DEFAULT_URL),
+                        help='ElasticSearch url, default: $ELASTICTOOLS_URL or {}'.format(DEFAULT_URL))
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    p = commands.add_parser('dump', help='export documents of an index as NDJSON')
+    p.add_argument('index')
+    p.add_argument('-o', '--output', default='-', help='output file, default: stdout')
+    p.add_argument('-q', '--query', help='query, in JSON')
+    p.add_argument('-c', '--concurrency', type=int,
+                   help='number of scroll slices, or of threads with --by-shard (default: one per node)')
+    p.add_argument('-b', '--batch-size', type=int, default=1000, help='number of documents per scroll request')
+    p.add_argument('-z', '--compress', type=int, nargs='?', const=6, default=0, choices=range(1, 10),
+                   metavar='LEVEL', help='gzip output, optional compression level (default: 6)')
+    p.add_argument('--by-shard', action='store_true', help='run one scroll per shard instead of slices')
+    p.add_argument('--source-only', action='store_true', help='write `_source` only, without `_id`')
+    p.set_defaults(func=dump)
+
+    p = commands.add_parser('load', help='import NDJSON documents (plain or gzip) into an index')
+    p.add_argument('index')
+    p.add_argument('-i', '--input', default='-', help='input file, default: stdin')
+    p.add_argument('-c', '--concurrency', type=int, default=1, help='number of bulk threads')
+    p.add_argument('-b', '--batch-size', type=int, default=500, help='number of documents per bulk request')
+    p.add_argument('--no-check', action='store_true', help='do not check that the index exists')
+    p.add_argument('--dead-letter', metavar='FILE',
+                   help='append failed documents to FILE (NDJSON) instead of stopping at the first error')
+    p.set_defaults(func=load)
+
+    p = commands.add_parser('clone', help='create dest_index like src_index and reindex src_index into it')
+    p.add_argument('src_index')
+    p.add_argument('dest_index')
+    p.add_argument('-c', '--concurrency', type=int, default=1, help='number of reindex slices')
+    p.add_argument('--size', type=int, help='maximum number of documents to reindex')
+    p.add_argument('--remote-host', help='reindex from a remote host')
+    p.add_argument('--overwrite', action='store_true', help='delete dest_index if existed')
+    p.add_argument('--wait', action='store_true', help='wait for the reindex to complete')
+    p.set_defaults(func=clone)
+    return parser
+
+
+def main(argv=None):
+    args = make_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
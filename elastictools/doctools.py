@@ -1,15 +1,85 @@
 import json
-import csv
-from collections import deque
+import queue
+import threading
 import elasticsearch
-import elasticsearch.helpers
-import jinja2
 
 from elastictools.indextools import IndexTools
+from elastictools.querycache import QueryCache
+
+# jinja2, csv, elasticsearch.helpers and the thread pool are imported on first use, to keep
+# `import elastictools` fast for short-lived jobs that do not need them
+
+
+_DONE = object()
+
+
+def _parallel_iter(tasks, thread_count, queue_size=None):
+    """
+    Run tasks on `thread_count` worker threads and iterate over their results as they come.
+    Every task is a callable returning an iterable of pages (lists). Idle workers pick the next
+    remaining task, so a worker that finishes early takes over the remaining tasks.
+    :param tasks: list of callables
+    :param thread_count:
+    :param queue_size: maximum number of pages waiting to be consumed, bound the memory usage
+    :return: generator of pages
+    """
+    task_queue = queue.Queue()
+    for task in tasks:
+        task_queue.put(task)
+    thread_count = max(1, min(thread_count, len(tasks)))
+    results = queue.Queue(maxsize=queue_size or 2 * thread_count)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def work():
+        try:
+            while not stop.is_set():
+                try:
+                    task = task_queue.get_nowait()
+                except queue.Empty:
+                    break
+                pages = task()
+                try:
+                    for page in pages:
+                        if not put(page):
+                            return
+                finally:
+                    # stop the task (ex.: clear its scroll) when the consumer stopped early
+                    close = getattr(pages, 'close', None)
+                    if close:
+                        close()
+        except Exception as e:
+            put(e)
+        finally:
+            put(_DONE)
+
+    workers = [threading.Thread(target=work, daemon=True) for _ in range(thread_count)]
+    for worker in workers:
+        worker.start()
+    try:
+        running = len(workers)
+        while running:
+            item = results.get()
+            if item is _DONE:
+                running -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        stop.set()
 
 
 class DocTools:
-    def __init__(self, hosts=None, es=None):
+    def __init__(self, hosts=None, es=None, cache=None):
         """
         Initialize an ElasticSearch instance with list of hosts
         :param hosts: list of host, ex.:
@@ -17,8 +87,10 @@ class DocTools:
                 {'host': 'localhost:9200'},
                 {'host': 'othernode', 'port': 443, 'url_prefix': 'es', 'use_ssl': True},
             ]
+        :param cache: a QueryCache instance to cache `search` and `count` results, True for a default one
         """
         self._indextool = None
+        self._cache = QueryCache() if cache is True else cache
         if es:
             self._es = es
         else:
@@ -28,15 +100,15 @@ class DocTools:
             self._es = elasticsearch.Elasticsearch(hosts)
 
     @classmethod
-    def from_url(cls, es_url):
+    def from_url(cls, es_url, cache=None):
         "Initialize an ElasticSearch with single url"
         hosts = [es_url]
-        return cls(hosts=hosts)
+        return cls(hosts=hosts, cache=cache)
 
     @classmethod
-    def from_es(cls, es):
+    def from_es(cls, es, cache=None):
         "Initialize an ElasticSearch instance"
-        return cls(es=es)
+        return cls(es=es, cache=cache)
 
     def indextool(self):
         """
@@ -48,6 +120,22 @@ class DocTools:
 
         return self._indextool
 
+    def cache(self):
+        """
+        Get the QueryCache instance, None if caching is disabled
+        :return:
+        """
+        return self._cache
+
+    def invalidate_cache(self, index_name=None):
+        """
+        Remove cached search and count results of an index
+        :param index_name: an index name, or list for index names, None for all
+        :return:
+        """
+        if self._cache is not None:
+            self._cache.invalidate(index_name)
+
     @staticmethod
     def render(obj, params):
         """
@@ -57,6 +145,8 @@ class DocTools:
         :return:
         """
 
+        import jinja2
+
         if type(obj) is str:
             t = jinja2.Template(obj)
             return t.render(params)
@@ -65,21 +155,32 @@ class DocTools:
             t = jinja2.Template(obj)
             return json.loads(t.render(**params))
 
-    def count(self, index_name, body, params, **kwargs):
+    def count(self, index_name, body, params, use_cache=True, **kwargs):
         """
         Count the number of document in an index, that match the body search
         :param index_name:
         :param body:
         :param params:
+        :param use_cache: if set and the cache is enabled, return the cached count when available
         :param kwargs:
         :return:
         """
-        if not self.indextool().exists(index_name):
-            raise ValueError('index not existed: {}'.format(index_name))
         if params:
             body = DocTools.render(body, params)
+        key = None
+        if use_cache and self._cache is not None:
+            key = QueryCache.make_key('count', index_name, body)
+            res = self._cache.get(key)
+            if res is not None:
+                return res
+            generation = self._cache.generation(key)
+        if not self.indextool().exists(index_name):
+            raise ValueError('index not existed: {}'.format(index_name))
         # print(body)
-        return self._es.count(index = index_name, body=body)['count']
+        res = self._es.count(index = index_name, body=body)['count']
+        if key is not None:
+            self._cache.put(key, res, generation)
+        return res
 
     def index(self, index_name, body, params=None, id=None, **kwargs):
         """
@@ -99,10 +200,13 @@ class DocTools:
         # fix for ES 7
         # doctype = IndexTools.mapping_get_doctype(self.indextool().get_mapping(index_name))
         doctype = '_doc'
-        if id:
-            return self._es.index(index = index_name, body=body, doc_type=doctype, id=id, **kwargs)
-        else:
-            return self._es.index(index=index_name, body=body, doc_type=doctype, **kwargs)
+        try:
+            if id:
+                return self._es.index(index = index_name, body=body, doc_type=doctype, id=id, **kwargs)
+            else:
+                return self._es.index(index=index_name, body=body, doc_type=doctype, **kwargs)
+        finally:
+            self.invalidate_cache(index_name)
 
     def delete(self, index_name, id, **kwargs):
         """
@@ -116,7 +220,10 @@ class DocTools:
             raise ValueError('index not existed: {}'.format(index_name))
         # doctype = IndexTools.mapping_get_doctype(self.indextool().get_mapping(index_name))
         doctype = '_doc'
-        return self._es.delete(index=index_name, id=id, doc_type=doctype, **kwargs)
+        try:
+            return self._es.delete(index=index_name, id=id, doc_type=doctype, **kwargs)
+        finally:
+            self.invalidate_cache(index_name)
 
     def exists(self, index_name, id, **kwargs):
         """
@@ -150,6 +257,79 @@ class DocTools:
         else:
             return self._es.get(index=index_name, id=id, doc_type=doctype, **kwargs)
 
+    def mget(self, index_name, ids, source=False, exists_only=False, **kwargs):
+        """
+        Get multiple documents in an index with a single mget request, without checking the index
+        :param index_name:
+        :param ids: list of ids
+        :param source: get source documents only
+        :param exists_only: do not fetch sources, return True/False for every id
+        :param kwargs:
+        :return: list in the order of ids, None for documents not found
+        """
+        if exists_only:
+            kwargs['_source'] = False
+        # fix for ES 7
+        doctype = '_doc'
+        docs = self._es.mget(body={'ids': list(ids)}, index=index_name, doc_type=doctype, **kwargs)['docs']
+        if exists_only:
+            return [doc.get('found', False) for doc in docs]
+        if source:
+            return [doc.get('_source') if doc.get('found') else None for doc in docs]
+        return [doc if doc.get('found') else None for doc in docs]
+
+    def get_many(self, index_name, ids, source=False, chunk_size=1000, thread_count=1, exists_only=False, **kwargs):
+        """
+        Get multiple documents in an index by their ids, using mget requests of `chunk_size` ids
+        :param index_name:
+        :param ids: list of ids
+        :param source: get source documents only
+        :param chunk_size: number of ids per mget request
+        :param thread_count: number of mget requests executed concurrently
+        :param exists_only: do not fetch sources, return True/False for every id
+        :param kwargs:
+        :return: list in the order of ids, None for documents not found
+        """
+        if not self.indextool().exists(index_name):
+            raise ValueError('index not existed: {}'.format(index_name))
+        ids = list(ids)
+        chunks = [ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)]
+        res = []
+        if thread_count <= 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                res.extend(self.mget(index_name, chunk, source=source, exists_only=exists_only, **kwargs))
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=min(thread_count, len(chunks))) as executor:
+                for docs in executor.map(lambda chunk: self.mget(index_name, chunk, source=source,
+                                                                 exists_only=exists_only, **kwargs), chunks):
+                    res.extend(docs)
+        return res
+
+    def exists_many(self, index_name, ids, chunk_size=1000, thread_count=1, **kwargs):
+        """
+        Check if multiple documents exist in an index, using mget requests without `_source`
+        :param index_name:
+        :param ids: list of ids
+        :param chunk_size: number of ids per mget request
+        :param thread_count: number of mget requests executed concurrently
+        :param kwargs:
+        :return: list of boolean in the order of ids
+        """
+        return self.get_many(index_name, ids, chunk_size=chunk_size, thread_count=thread_count, exists_only=True,
+                             **kwargs)
+
+    def get_coalescer(self, index_name, source=False, **kwargs):
+        """
+        Get a coalescer that merges concurrent single document gets (from many threads) into mget requests
+        :param index_name:
+        :param source: get source documents only
+        :param kwargs: see GetCoalescer
+        :return: a GetCoalescer
+        """
+        from elastictools.getcoalescer import GetCoalescer
+        return GetCoalescer(self, index_name, source=source, **kwargs)
+
     @staticmethod
     def make_search_body(body=None, params=None, from_=None, size=None, query=None, _source=None, highlight=None,
                          aggs=None, sort=None, script_fields=None, post_filter=None, rescore=None, min_score=None,
@@ -217,21 +397,45 @@ class DocTools:
 
         return body
 
-    def search(self, index_name, body=None, params=None, source_only=False, reserve_id_score=False, **kwargs):
+    @staticmethod
+    def _is_cursor_search(body, kwargs):
+        """
+        Check if a search opens or uses a server side cursor (scroll or point in time)
+        """
+        if 'scroll' in kwargs:
+            return True
+        if isinstance(body, str):
+            return '"pit"' in body
+        return isinstance(body, dict) and 'pit' in body
+
+    def search(self, index_name, body=None, params=None, source_only=False, reserve_id_score=False, use_cache=True,
+               **kwargs):
         """
         Execute a search query
         :param index_name:
         :param body:
         :param params:
         :param source_only: get source documents only as Python list, with elastics `_id` and `_score`
+        :param use_cache: if set and the cache is enabled, return the cached result when available,
+            scroll and point in time searches are never cached
         :param kwargs:
         :return:
         """
-        if not self.indextool().exists(index_name):
-            raise ValueError('index not existed: {}'.format(index_name))
         if params:
             body = DocTools.render(body, params)
-        res = self._es.search(index_name, body=body, **kwargs)
+        res = None
+        key = None
+        if use_cache and self._cache is not None and not DocTools._is_cursor_search(body, kwargs):
+            key = QueryCache.make_key('search', index_name, body, kwargs)
+            res = self._cache.get(key)
+            if res is None:
+                generation = self._cache.generation(key)
+        if res is None:
+            if not self.indextool().exists(index_name):
+                raise ValueError('index not existed: {}'.format(index_name))
+            res = self._es.search(index_name, body=body, **kwargs)
+            if key is not None:
+                self._cache.put(key, res, generation)
         if source_only:
             tmp = res['hits']['hits']
             res = []
@@ -244,7 +448,7 @@ class DocTools:
 
     def dump(self, index_name, query=None, params=None,
              datetime_field=None, datetime_from=None, datetime_to=None, to_file=False, page_size=1000,
-             source_excludes=None, source_includes=None, **kwargs):
+             source_excludes=None, source_includes=None, mode='page', thread_count=None, **kwargs):
         """
 
         :param index_name:
@@ -254,6 +458,11 @@ class DocTools:
         :param datetime_from:  20181101T000000+07:00
         :param datetime_to:    20181107T235959+07:00
         :param to_file:
+        :param mode: 'page' - from/size pagination sorted by datetime_field,
+            'scroll' - a single scroll, 'slices' - sliced scroll with `thread_count` slices,
+            'shards' - one scroll per shard, spread over `thread_count` threads (see `scan`),
+            documents are not ordered in scroll modes
+        :param thread_count: number of threads for 'slices' and 'shards' modes
         :param kwargs:
         :return:
         """
@@ -285,8 +494,12 @@ class DocTools:
                     ]
                 }
             }
+        if mode != 'page':
+            return self._dump_scan(index_name, query=query, params=params, to_file=to_file, page_size=page_size,
+                                   source_excludes=source_excludes, source_includes=source_includes, mode=mode,
+                                   thread_count=thread_count, **kwargs)
         body = self.make_search_body(query=query, params=params, sort=sort)
-        res = self.search(index_name, body=body, source_only=False, **kwargs)
+        res = self.search(index_name, body=body, source_only=False, use_cache=False, **kwargs)
         total = res['hits']['total']
         print('Total: {}'.format(total))
         _from = 0
@@ -299,7 +512,7 @@ class DocTools:
             print('reading {} to {}...'.format(_from+1, min(_from+_size, total)))
             body = self.make_search_body(query=query, params=params, sort=sort, from_=_from, size=_size,
                                          source_includes=source_includes, source_excludes=source_excludes)
-            r = self.search(index_name, body=body, source_only=True, **kwargs)
+            r = self.search(index_name, body=body, source_only=True, use_cache=False, **kwargs)
             _from += _size
             if to_file:
                 file.write(',\n'.join([json.dumps(rec) for rec in r]) + (',' if _from<total else ''))
@@ -313,6 +526,126 @@ class DocTools:
             return total
         return res
 
+    def _dump_scan(self, index_name, to_file=False, mode='scroll', thread_count=None, **kwargs):
+        if mode == 'scroll':
+            hits = self.scan(index_name, **kwargs)
+        elif mode == 'slices':
+            hits = self.scan(index_name, slices=thread_count or 2, **kwargs)
+        elif mode == 'shards':
+            hits = self.scan(index_name, by_shard=True, thread_count=thread_count, **kwargs)
+        else:
+            raise ValueError('unknown dump mode: {}'.format(mode))
+        total = 0
+        res = []
+        if to_file:
+            file = open(to_file, 'w')
+            file.write('[')
+        for hit in hits:
+            if to_file:
+                file.write((',\n' if total else '') + json.dumps(hit['_source']))
+            else:
+                res.append(hit['_source'])
+            total += 1
+        print('Total: {}'.format(total))
+
+        if to_file:
+            file.write(']')
+            file.close()
+            return total
+        return res
+
+    def scan(self, index_name, query=None, params=None, page_size=1000, slices=1, scroll='5m',
+             source_includes=None, source_excludes=None, by_shard=False, thread_count=None, **kwargs):
+        """
+        Iterate over all documents matching a query with scroll, without loading them in memory
+        :param index_name:
+        :param query:
+        :param params:
+        :param page_size: number of documents per scroll request
+        :param slices: if > 1, use a sliced scroll, with one thread per slice
+        :param scroll: scroll context keep alive
+        :param source_includes:
+        :param source_excludes:
+        :param by_shard: run one scroll per shard (see `shard_preferences`) instead of slices
+        :param thread_count: number of threads for sliced or per shard scrolls, default: slices for sliced scroll,
+            number of nodes holding the shards for per shard scroll
+        :param kwargs: passed to elasticsearch.helpers.scan
+        :return: generator of search hits (with `_id` and `_source`), not ordered if slices > 1 or by_shard
+        """
+        import elasticsearch.helpers
+
+        if not self.indextool().exists(index_name):
+            raise ValueError('index not existed: {}'.format(index_name))
+        body = self.make_search_body(query=query, params=params, source_includes=source_includes,
+                                     source_excludes=source_excludes)
+        if slices <= 1 and not by_shard:
+            for hit in elasticsearch.helpers.scan(self._es, query=body, index=index_name, size=page_size,
+                                                  scroll=scroll, **kwargs):
+                yield hit
+            return
+
+        def make_task(index, task_body, preference=None):
+            task_kwargs = dict(kwargs)
+            if preference:
+                task_kwargs['preference'] = preference
+
+            def task():
+                page = []
+                for hit in elasticsearch.helpers.scan(self._es, query=task_body, index=index, size=page_size,
+                                                      scroll=scroll, **task_kwargs):
+                    page.append(hit)
+                    if len(page) >= page_size:
+                        yield page
+                        page = []
+                if page:
+                    yield page
+            return task
+
+        if by_shard:
+            preferences = self.shard_preferences(index_name)
+            tasks = [make_task(index, body, preference) for index, preference, _ in preferences]
+            if not thread_count:
+                thread_count = len(set(node for _, _, node in preferences))
+        else:
+            tasks = [make_task(index_name, dict(body, slice={'id': i, 'max': slices})) for i in range(slices)]
+            if not thread_count:
+                thread_count = slices
+
+        for page in _parallel_iter(tasks, thread_count):
+            for hit in page:
+                yield hit
+
+    def shard_preferences(self, index_name):
+        """
+        List the shards of an index (via search_shards) with a search preference targeting each of them.
+        Every shard is assigned to the node, among the nodes holding a copy of it, with the fewest shards
+        assigned so far, and the result is interleaved by node, so that concurrent scrolls spread evenly
+        over the nodes and every request is served by the node holding the data.
+        :param index_name: an index name, or list for index names
+        :return: list of (index, preference, node), ex.: ('logs', '_shards:0|_prefer_nodes:node_id', 'node_id')
+        """
+        shards = self._es.search_shards(index=index_name)['shards']
+        load = {}
+        by_node = {}
+        # only started copies can serve searches, shards with the fewest of them are assigned first
+        shards = [[c for c in copies if c.get('node') and c.get('state', 'STARTED') == 'STARTED'] or copies
+                  for copies in shards]
+        for copies in sorted(shards, key=len):
+            node = min((c.get('node') for c in copies), key=lambda n: (load.get(n, 0), n or ''))
+            load[node] = load.get(node, 0) + 1
+            shard = copies[0]
+            preference = '_shards:{}'.format(shard['shard'])
+            if node:
+                preference += '|_prefer_nodes:{}'.format(node)
+            by_node.setdefault(node, []).append((shard['index'], preference, node))
+        res = []
+        queues = list(by_node.values())
+        while queues:
+            for q in queues:
+                res.append(q.pop(0))
+            queues = [q for q in queues if q]
+        return res
+
     def msearch(self, indices, queries, return_body_only=False, **kwargs):
         """
         Execute a msearch query
@@ -331,14 +664,18 @@ class DocTools:
             return body
         return self._es.msearch(body=body)
 
-    def bulk(self, index_name, actions, doctype=None, thread_count=1, check_index_existed=True, **kwargs):
+    def bulk(self, index_name, actions, doctype=None, thread_count=1, check_index_existed=True, sink=None,
+             **kwargs):
         """
         Do bulk actions, if thread_count = 1, otherwise call parallel_bulk
         :param index_name:
         :param actions: any iterable, can also be a generator, in search result format (with `_source`) or orignal format
         :param thread_count: 1 if using bulk, other wise, usi aarop
+        :param sink: a BulkSink, if set, stream the item results: successes are counted, failed items are passed
+            to the sink with their original actions, and errors never stop the bulk.
+            `max_retries` (items rejected with 429) is only supported with thread_count = 1
         :param kwargs:
-        :return:
+        :return: (succeeded, failed) if sink is set
         """
         if check_index_existed:
             if not self.indextool().exists(index_name):
@@ -349,13 +686,106 @@ class DocTools:
             # doctype = IndexTools.mapping_get_doctype(self.indextool().get_mapping(index_name))
             doctype = '_doc'
 
-        if thread_count<=1:
-            print('Normal bulk')
-            return elasticsearch.helpers.bulk(self._es, actions, index=index_name, doc_type=doctype, **kwargs)
+        import elasticsearch.helpers
+        from collections import deque
+
+        # actions carrying their own `_index` write to other indices, their cached results are invalidated too
+        written = {index_name}
+        if self._cache is not None:
+            def track_indices(actions):
+                for action in actions:
+                    if isinstance(action, dict) and action.get('_index'):
+                        written.add(action['_index'])
+                    yield action
+            actions = track_indices(actions)
+
+        try:
+            if sink is not None:
+                return self._bulk_to_sink(index_name, actions, doctype, thread_count, sink, **kwargs)
+            if thread_count<=1:
+                print('Normal bulk')
+                return elasticsearch.helpers.bulk(self._es, actions, index=index_name, doc_type=doctype, **kwargs)
+            else:
+                print('Parallel bulk', thread_count)
+                return deque(elasticsearch.helpers.parallel_bulk(self._es, actions, index=index_name, doc_type=doctype,
+                                                           thread_count=thread_count, **kwargs), maxlen=0)
+        finally:
+            self.invalidate_cache(list(written))
+
+    def _bulk_to_sink(self, index_name, actions, doctype, thread_count, sink, **kwargs):
+        import time
+        from itertools import islice
+
+        # retries are run here: the helpers yield retried items out of order, which would break
+        # the pairing of item results with their actions
+        max_retries = kwargs.pop('max_retries', 0)
+        initial_backoff = kwargs.pop('initial_backoff', 2)
+        max_backoff = kwargs.pop('max_backoff', 600)
+        kwargs.pop('yield_ok', None)
+        if max_retries and thread_count > 1:
+            raise ValueError('max_retries is not supported with thread_count > 1.')
+
+        if not max_retries:
+            for ok, action, item in self._bulk_items(index_name, actions, doctype, thread_count, **kwargs):
+                sink.add(ok, action, item)
+            return sink.succeeded, sink.failed
+
+        actions = iter(actions)
+        chunk_size = kwargs.get('chunk_size', 500)
+        while True:
+            chunk = list(islice(actions, chunk_size))
+            if not chunk:
+                break
+            for attempt in range(max_retries + 1):
+                if attempt:
+                    time.sleep(min(max_backoff, initial_backoff * 2 ** (attempt - 1)))
+                to_retry = []
+                for ok, action, item in self._bulk_items(index_name, chunk, doctype, thread_count, **kwargs):
+                    status = list(item.values())[0].get('status')
+                    if not ok and status == 429 and attempt < max_retries:
+                        to_retry.append(action)
+                    else:
+                        sink.add(ok, action, item)
+                if not to_retry:
+                    break
+                chunk = to_retry
+        return sink.succeeded, sink.failed
+
+    def _bulk_items(self, index_name, actions, doctype, thread_count, **kwargs):
+        """
+        Run bulk actions without raising on errors, yield (ok, original action, item result) for every action
+        """
+        import elasticsearch.helpers
+        from collections import deque
+
+        # one item result per action, in the order of the actions: keep the actions in flight to pair them
+        in_flight = deque()
+
+        def track(actions):
+            for action in actions:
+                in_flight.append(action)
+                yield action
+
+        kwargs['raise_on_error'] = False
+        kwargs['raise_on_exception'] = False
+        if thread_count <= 1:
+            results = elasticsearch.helpers.streaming_bulk(self._es, track(actions), index=index_name,
+                                                           doc_type=doctype, max_retries=0, yield_ok=True, **kwargs)
         else:
-            print('Parallel bulk', thread_count)
-            return deque(elasticsearch.helpers.parallel_bulk(self._es, actions, index=index_name, doc_type=doctype,
-                                                       thread_count=thread_count, **kwargs), maxlen=0)
+            results = elasticsearch.helpers.parallel_bulk(self._es, track(actions), index=index_name,
+                                                          doc_type=doctype, thread_count=thread_count, **kwargs)
+        for ok, item in results:
+            yield ok, in_flight.popleft(), item
+
+    def bulk_writer(self, index_name=None, **kwargs):
+        """
+        Get a write-behind buffer that coalesces single document writes into bulk requests
+        :param index_name: default index name
+        :param kwargs: see BulkWriter
+        :return: a BulkWriter, should be closed (or used as a context manager) to flush the remaining writes
+        """
+        from elastictools.bulkwriter import BulkWriter
+        return BulkWriter(self, index_name=index_name, **kwargs)
 
     def bulk_insert_from_csv(self, filename, index_name, csv_fields=None, thread_count=1, **kwargs):
         """
@@ -367,6 +797,8 @@ class DocTools:
         :param kwargs:
         :return:
         """
+        import csv
+
         with open(filename) as f:
             reader = csv.DictReader(f, fieldnames=csv_fields)
             return self.bulk(index_name, reader, thread_count, **kwargs)
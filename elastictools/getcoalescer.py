@@ -0,0 +1,104 @@
+import copy
+import threading
+from concurrent.futures import Future
+
+
+class GetCoalescer:
+    def __init__(self, doctool, index_name, source=False, tick=0.002, max_batch_size=1000,
+                 check_index_existed=True, **kwargs):
+        """
+        Merge concurrent single document gets into one mget request per tick.
+        The first get of a batch waits `tick` seconds for other gets to join it, then the whole batch is
+        sent as one mget. A batch that reaches `max_batch_size` ids is sent at once.
+        :param doctool: a DocTools instance
+        :param index_name:
+        :param source: get source documents only
+        :param tick: time a batch waits for other gets, in seconds
+        :param max_batch_size: maximum number of ids per mget request
+        :param check_index_existed:
+        :param kwargs: passed to mget
+        """
+        if check_index_existed and not doctool.indextool().exists(index_name):
+            raise ValueError('index not existed: {}'.format(index_name))
+        self._doctool = doctool
+        self.index_name = index_name
+        self.source = source
+        self.tick = tick
+        self.max_batch_size = max_batch_size
+        self._kwargs = kwargs
+        self._pending = {}
+        self._batch_id = 0
+        self._lock = threading.Lock()
+
+    def load(self, id):
+        """
+        Request a document, without waiting for it
+        :param id:
+        :return: a Future, resolved with the document (or None if not found). Callers requesting
+            the same id in a batch get their own copy of the document.
+        """
+        future = Future()
+        with self._lock:
+            futures = self._pending.setdefault(id, [])
+            futures.append(future)
+            size = len(self._pending)
+            # the first get of a batch starts its timer
+            start_timer = size == 1 and len(futures) == 1
+            batch_id = self._batch_id
+        if size >= self.max_batch_size:
+            self.dispatch()
+        elif start_timer:
+            timer = threading.Timer(self.tick, self._dispatch_batch, args=(batch_id,))
+            timer.daemon = True
+            timer.start()
+        return future
+
+    def get(self, id, timeout=None):
+        """
+        Get a document by its id, waiting for the batch it joined
+        :param id:
+        :param timeout:
+        :return: the document, None if not found
+        """
+        return self.load(id).result(timeout)
+
+    def dispatch(self):
+        """
+        Send the current batch now
+        :return: number of ids sent
+        """
+        with self._lock:
+            batch = self._take()
+        return self._send(batch)
+
+    def _dispatch_batch(self, batch_id):
+        # a timer only sends the batch it was started for, not a later one
+        with self._lock:
+            if batch_id != self._batch_id:
+                return 0
+            batch = self._take()
+        return self._send(batch)
+
+    def _take(self):
+        batch = self._pending
+        self._pending = {}
+        self._batch_id += 1
+        return batch
+
+    def _send(self, batch):
+        if not batch:
+            return 0
+        ids = list(batch.keys())
+        try:
+            docs = self._doctool.mget(self.index_name, ids, source=self.source, **self._kwargs)
+        except Exception as e:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+        else:
+            for id, doc in zip(ids, docs):
+                for i, future in enumerate(batch[id]):
+                    if not future.done():
+                        future.set_result(doc if i == 0 else copy.deepcopy(doc))
+        return len(ids)
@@ -360,6 +360,95 @@ class IndexTools:
         }
         return self._es.delete_by_query(index=index_name, body=query, wait_for_completion=wait_for_completion, **kwargs)
 
+    def exists_alias(self, alias_name, **kwargs):
+        """
+        Check if an alias existed in ES
+        :param alias_name: an alias name, or list for alias names
+        :param kwargs:
+        :return: True/False
+        """
+        return self._es.indices.exists_alias(name=alias_name, **kwargs)
+
+    def get_alias(self, alias_name, **kwargs):
+        """
+        Get indices of an alias
+        :param alias_name: an alias name
+        :param kwargs:
+        :return: dictionary of index name: alias properties, ex.: {'logs-000002': {'is_write_index': True}}
+            None if the alias does not exist
+        """
+        if not self.exists_alias(alias_name):
+            return None
+        res = self._es.indices.get_alias(name=alias_name, **kwargs)
+        return {index: info['aliases'][alias_name] for index, info in res.items()}
+
+    def get_write_index(self, alias_name):
+        """
+        Get the index that receives the writes of an alias
+        :param alias_name:
+        :return: an index name, None if the alias does not exist or has no write index
+        """
+        indices = self.get_alias(alias_name)
+        if not indices:
+            return None
+        for index, alias in indices.items():
+            if alias.get('is_write_index'):
+                return index
+        if len(indices) == 1:
+            return list(indices.keys())[0]
+        return None
+
+    def rollover(self, alias_name, conditions=None, new_index=None, body=None, dry_run=False, **kwargs):
+        """
+        Roll an alias over to a new index
+        :param alias_name: a write alias
+        :param conditions: ex.: {'max_age': '7d', 'max_docs': 1000000, 'max_size': '50gb'}, None to roll over now
+        :param new_index: name of the new index, None to increment the number at the end of the current index name
+        :param body: settings, mappings or aliases of the new index, templates apply too
+        :param dry_run: only check the conditions
+        :param kwargs:
+        :return: response, with `old_index`, `new_index`, `rolled_over` and `conditions`
+        """
+        if not self.exists_alias(alias_name):
+            raise ValueError('alias not existed: {}'.format(alias_name))
+        body = dict(body or {})
+        if conditions:
+            body['conditions'] = conditions
+        return self._es.indices.rollover(alias=alias_name, new_index=new_index, body=body, dry_run=dry_run, **kwargs)
+
+    def forcemerge(self, index_name, max_num_segments=1, **kwargs):
+        """
+        Force merge an index, usually after it is no longer written
+        :param index_name:
+        :param max_num_segments:
+        :param kwargs:
+        :return:
+        """
+        if not self.exists(index_name):
+            raise ValueError('index not existed: {}'.format(index_name))
+        return self._es.indices.forcemerge(index=index_name, max_num_segments=max_num_segments, **kwargs)
+
+    def set_read_only(self, index_name, read_only=True, **kwargs):
+        """
+        Block (or unblock) writes to an index
+        :param index_name:
+        :param read_only:
+        :param kwargs:
+        :return:
+        """
+        if not self.exists(index_name):
+            raise ValueError('index not existed: {}'.format(index_name))
+        return self._es.indices.put_settings(index=index_name, body={'index.blocks.write': read_only}, **kwargs)
+
+    def rollover_manager(self, **kwargs):
+        """
+        Get a rollover manager, see RolloverManager
+        :param kwargs:
+        :return: a RolloverManager
+        """
+        from elastictools.rollover import RolloverManager
+        return RolloverManager(self, **kwargs)
+
     def exists_template(self, template_name, **kwargs):
         """
         Check if an template or multiple templates (comma separated names) existed in ES
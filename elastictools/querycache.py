@@ -0,0 +1,211 @@
+import json
+import time
+import fnmatch
+import threading
+from collections import OrderedDict
+
+
+class QueryCache:
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl=60, refresh_delay=1.0):
+        """
+        Client-side LRU/TTL cache for search and count results.
+        Results are stored as serialized JSON, so every hit returns a fresh copy that can be modified freely.
+        :param max_entries: maximum number of cached results
+        :param max_bytes: maximum total size of cached results (size of the serialized JSON)
+        :param ttl: time to live of an entry in seconds, None for no expiration
+        :param refresh_delay: results of indices written less than `refresh_delay` seconds ago are not stored,
+            as they may not see the write yet (index.refresh_interval, 1s by default)
+        """
+        if max_entries <= 0:
+            raise ValueError('max_entries must be positive.')
+        if max_bytes <= 0:
+            raise ValueError('max_bytes must be positive.')
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.refresh_delay = refresh_delay
+        self._entries = OrderedDict()
+        self._by_index = {}
+        self._bytes = 0
+        # bumped by invalidations, see `generation`
+        self._generations = {}
+        self._writes = 0
+        self._clears = 0
+        # time of the last write, per index and to any index
+        self._last_writes = {}
+        self._last_write = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def split_indices(index_name):
+        """
+        Normalize an index name, a comma separated names or a list of names to a tuple of names
+        :param index_name:
+        :return:
+        """
+        if isinstance(index_name, (list, tuple)):
+            names = index_name
+        else:
+            names = str(index_name).split(',')
+        return tuple(sorted(set(name.strip() for name in names if name.strip())))
+
+    @staticmethod
+    def make_key(kind, index_name, body=None, kwargs=None):
+        """
+        Build a cache key from the request kind, the indices and a canonical form of the rendered body
+        :param kind: 'search' or 'count'
+        :param index_name:
+        :param body: dict or (rendered) JSON string
+        :param kwargs: extra params passed to elasticsearch
+        :return:
+        """
+        if isinstance(body, str):
+            try:
+                body = json.loads(body)
+            except ValueError:
+                pass
+        return (kind,
+                QueryCache.split_indices(index_name),
+                json.dumps(body, sort_keys=True, separators=(',', ':'), default=str),
+                json.dumps(kwargs or {}, sort_keys=True, separators=(',', ':'), default=str))
+
+    def get(self, key):
+        """
+        Get a cached result
+        :param key: a key returned by `make_key`
+        :return: a copy of the cached result, None if not cached or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, data = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return json.loads(data)
+
+    def generation(self, key):
+        """
+        Get the write generation of the indices of a key. Take it before sending the request,
+        and pass it to `put`, so that a result read before a concurrent write is not stored.
+        :param key: a key returned by `make_key`
+        :return:
+        """
+        with self._lock:
+            return self._generation(key[1])
+
+    @staticmethod
+    def _is_pattern(names):
+        return any('*' in name or '?' in name or name == '_all' for name in names)
+
+    def _generation(self, names):
+        if QueryCache._is_pattern(names):
+            # the indices matching a pattern are unknown, any write counts
+            return self._clears, self._writes
+        return (self._clears,) + tuple(self._generations.get(name, 0) for name in names)
+
+    def _refreshing(self, names):
+        """
+        Return True if one of the indices was written within the refresh delay
+        """
+        if not self.refresh_delay:
+            return False
+        if QueryCache._is_pattern(names):
+            last_write = self._last_write
+        else:
+            last_write = max((self._last_writes[name] for name in names if name in self._last_writes), default=None)
+        return last_write is not None and time.monotonic() - last_write < self.refresh_delay
+
+    def put(self, key, value, generation=None):
+        """
+        Store a result, evict the least recently used entries if the cache is over its bounds
+        :param key: a key returned by `make_key`
+        :param value: a JSON serializable result
+        :param generation: the value of `generation(key)` before the request, the result is not stored
+            if the indices were invalidated since then
+        :return: True if stored, the result is not stored either if the indices were written within the
+            refresh delay
+        """
+        data = json.dumps(value)
+        if len(data) > self.max_bytes:
+            return False
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if generation is not None and generation != self._generation(key[1]):
+                return False
+            if self._refreshing(key[1]):
+                return False
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, data)
+            self._bytes += len(data)
+            for name in key[1]:
+                self._by_index.setdefault(name, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+        return True
+
+    def invalidate(self, index_name=None):
+        """
+        Remove cached results of an index. Entries searched with wildcards or `_all` that match
+        the index are removed too. Aliases are not resolved, entries cached through an alias expire with ttl.
+        :param index_name: an index name, or list for index names, None to clear the whole cache
+        :return:
+        """
+        with self._lock:
+            if index_name is None:
+                self._clears += 1
+                self._entries.clear()
+                self._by_index.clear()
+                self._bytes = 0
+                return
+            names = QueryCache.split_indices(index_name)
+            now = time.monotonic()
+            self._writes += 1
+            self._last_write = now
+            for name in names:
+                self._generations[name] = self._generations.get(name, 0) + 1
+                self._last_writes[name] = now
+            keys = set()
+            for pattern, pattern_keys in self._by_index.items():
+                if pattern == '_all' or any(fnmatch.fnmatchcase(name, pattern) for name in names):
+                    keys.update(pattern_keys)
+            for key in keys:
+                self._remove(key)
+
+    def clear(self):
+        """
+        Remove all cached results
+        :return:
+        """
+        self.invalidate()
+
+    def stats(self):
+        """
+        Get cache statistics
+        :return: dict of entries, bytes, hits and misses
+        """
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'hits': self.hits, 'misses': self.misses}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= len(entry[1])
+        for name in key[1]:
+            keys = self._by_index.get(name)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_index[name]
@@ -0,0 +1,183 @@
+import re
+import time
+import threading
+
+_SIZE_UNITS = {'b': 1, 'kb': 1024, 'mb': 1024 ** 2, 'gb': 1024 ** 3, 'tb': 1024 ** 4, 'pb': 1024 ** 5}
+_AGE_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_size(size):
+    """
+    Parse a byte size
+    :param size: number of bytes, or string like '50gb'
+    :return: number of bytes
+    """
+    if size is None or isinstance(size, (int, float)):
+        return size
+    m = re.match(r'^\s*(\d+(?:\.\d+)?)\s*([kmgtp]?b)?\s*$', size.lower())
+    if not m:
+        raise ValueError('invalid size: {}'.format(size))
+    return int(float(m.group(1)) * _SIZE_UNITS[m.group(2) or 'b'])
+
+
+def parse_age(age):
+    """
+    Parse a time value
+    :param age: number of seconds, or string like '7d', '12h'
+    :return: number of seconds
+    """
+    if age is None or isinstance(age, (int, float)):
+        return age
+    m = re.match(r'^\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h|d)?\s*$', age.lower())
+    if not m:
+        raise ValueError('invalid age: {}'.format(age))
+    return float(m.group(1)) * _AGE_UNITS[m.group(2) or 's']
+
+
+class RolloverManager:
+    def __init__(self, indextool, check_interval=60, force_merge=False, max_num_segments=1, read_only=False,
+                 background=True):
+        """
+        Keep write aliases over template-backed time series indices, and roll them over to a new index
+        when their write index reaches a maximum size, doc count or age.
+        `tick()` can be called as often as needed: it does nothing until `check_interval` has elapsed,
+        then checks every managed alias with a single stats request.
+        :param indextool: an IndexTools instance
+        :param check_interval: minimum time between two checks, in seconds
+        :param force_merge: force merge the old index after a rollover
+        :param max_num_segments: number of segments of force merged indices
+        :param read_only: block writes to the old index after a rollover
+        :param background: seal (force merge / read only) old indices in a background thread
+        """
+        self._indextool = indextool
+        self._es = indextool._es
+        self.check_interval = check_interval
+        self.force_merge = force_merge
+        self.max_num_segments = max_num_segments
+        self.read_only = read_only
+        self.background = background
+        self._aliases = {}
+        self._write_indices = {}
+        self._creation_dates = {}
+        self._last_check = None
+        self._lock = threading.Lock()
+
+    def manage(self, alias_name, max_size=None, max_docs=None, max_age=None, bootstrap_index=None, body=None):
+        """
+        Add a write alias to manage, create its first index if the alias does not exist
+        :param alias_name:
+        :param max_size: maximum size of the primary shards of the write index, ex.: '50gb'
+        :param max_docs: maximum number of documents of the write index
+        :param max_age: maximum age of the write index, ex.: '7d'
+        :param bootstrap_index: name of the first index, default: '<alias_name>-000001',
+            should match the pattern of the template
+        :param body: settings or mappings of the first index, on top of the template
+        :return:
+        """
+        if max_size is None and max_docs is None and max_age is None:
+            raise ValueError('max_size, max_docs or max_age param missing.')
+        self._aliases[alias_name] = {'max_size': parse_size(max_size), 'max_docs': max_docs,
+                                     'max_age': parse_age(max_age)}
+        write_index = self._indextool.get_write_index(alias_name)
+        if write_index is None:
+            if self._indextool.exists_alias(alias_name):
+                raise ValueError('alias {} has no write index.'.format(alias_name))
+            write_index = bootstrap_index or '{}-000001'.format(alias_name)
+            body = dict(body or {})
+            body['aliases'] = {alias_name: {'is_write_index': True}}
+            self._indextool.create(write_index, body=body)
+        self._write_indices[alias_name] = write_index
+
+    def write_index(self, alias_name):
+        """
+        Get the current write index of a managed alias
+        :param alias_name:
+        :return:
+        """
+        return self._write_indices.get(alias_name)
+
+    def tick(self, force=False):
+        """
+        Check the managed aliases if `check_interval` has elapsed since the last check,
+        and roll over those whose write index reached a condition
+        :param force: check now
+        :return: list of rollover responses, empty if nothing was rolled over
+        """
+        now = time.monotonic()
+        if not force and self._last_check is not None and now - self._last_check < self.check_interval:
+            return []
+        if not self._lock.acquire(blocking=False):
+            # another thread is checking
+            return []
+        try:
+            self._last_check = now
+            return self._check()
+        finally:
+            self._lock.release()
+
+    def _check(self):
+        if not self._write_indices:
+            return []
+        stats = self._es.indices.stats(index=','.join(sorted(set(self._write_indices.values()))),
+                                       metric='docs,store')['indices']
+        res = []
+        for alias_name, write_index in list(self._write_indices.items()):
+            conditions = self._reached(alias_name, write_index, stats.get(write_index))
+            if not conditions:
+                continue
+            r = self._indextool.rollover(alias_name, conditions=conditions)
+            if r.get('rolled_over'):
+                res.append(r)
+                self._write_indices[alias_name] = r['new_index']
+                self._creation_dates.pop(r['old_index'], None)
+                self._seal(r['old_index'])
+            else:
+                # rolled over by someone else, or conditions not met on the cluster side
+                self._write_indices[alias_name] = self._indextool.get_write_index(alias_name) or write_index
+        return res
+
+    def _reached(self, alias_name, write_index, stats):
+        """
+        Return the rollover conditions of an alias if its write index reached one of them, None otherwise
+        """
+        limits = self._aliases[alias_name]
+        conditions = {}
+        reached = False
+        if limits['max_docs'] is not None:
+            conditions['max_docs'] = limits['max_docs']
+            if stats and stats['primaries']['docs']['count'] >= limits['max_docs']:
+                reached = True
+        if limits['max_size'] is not None:
+            conditions['max_size'] = '{}b'.format(limits['max_size'])
+            if stats and stats['primaries']['store']['size_in_bytes'] >= limits['max_size']:
+                reached = True
+        if limits['max_age'] is not None:
+            conditions['max_age'] = '{}s'.format(int(limits['max_age']))
+            if time.time() - self._creation_date(write_index) >= limits['max_age']:
+                reached = True
+        return conditions if reached else None
+
+    def _creation_date(self, index_name):
+        if index_name not in self._creation_dates:
+            settings = self._indextool.get_settings(index_name)
+            self._creation_dates[index_name] = int(settings['index']['creation_date']) / 1000.0
+        return self._creation_dates[index_name]
+
+    def _seal(self, index_name):
+        if not self.read_only and not self.force_merge:
+            return
+        if self.background:
+            threading.Thread(target=self.seal, args=(index_name,), daemon=True).start()
+        else:
+            self.seal(index_name)
+
+    def seal(self, index_name):
+        """
+        Make an index that is no longer written read only and / or force merge it, depending on the settings
+        :param index_name:
+        :return:
+        """
+        if self.read_only:
+            self._indextool.set_read_only(index_name)
+        if self.force_merge:
+            self._indextool.forcemerge(index_name, max_num_segments=self.max_num_segments)
@@ -14,6 +14,9 @@ setup_args = dict(
     long_description=README + '\n\n' + HISTORY,
     license='MIT',
     packages=find_packages(),
+    entry_points={
+        'console_scripts': ['elastictools=elastictools.cli:main'],
+    },
     author='Thuc Nguyen',
     author_email='gthuc.nguyen@gmail.com',
     keywords=['Elastic', 'ElasticSearch', 'Elastic Stack', 'Python 3', 'Elastic 7'],
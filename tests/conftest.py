@@ -0,0 +1,49 @@
+import json
+import threading
+import types
+
+import pytest
+from elasticsearch.serializer import JSONSerializer
+
+
+class FakeES:
+    """
+    Minimal client for the bulk helpers: answers every bulk request item with a success,
+    unless a list of statuses is registered for its `_id` in `statuses` (consumed one per request)
+    """
+    def __init__(self):
+        self.transport = types.SimpleNamespace(serializer=JSONSerializer())
+        self.requests = []
+        self.statuses = {}
+        self._lock = threading.Lock()
+
+    def bulk(self, body, **kwargs):
+        lines = [json.loads(line) for line in body.splitlines() if line]
+        actions = []
+        i = 0
+        while i < len(lines):
+            op_type, meta = lines[i].popitem()
+            source = None
+            if op_type != 'delete':
+                i += 1
+                source = lines[i]
+            actions.append((op_type, meta, source))
+            i += 1
+        items = []
+        errors = False
+        with self._lock:
+            self.requests.append(actions)
+            for op_type, meta, _ in actions:
+                statuses = self.statuses.get(meta.get('_id'))
+                status = statuses.pop(0) if statuses else 201
+                item = {'_id': meta.get('_id'), 'status': status}
+                if status >= 300:
+                    item['error'] = {'type': 'error_{}'.format(status)}
+                    errors = True
+                items.append({op_type: item})
+        return {'errors': errors, 'items': items}
+
+
+@pytest.fixture
+def fake_es():
+    return FakeES()
@@ -0,0 +1,49 @@
+from elastictools.doctools import DocTools
+from elastictools.bulksink import BulkSink
+
+
+def bulk(fake_es, **kwargs):
+    failures = []
+    sink = BulkSink(callback=lambda action, item: failures.append((action['_id'], item)))
+    actions = [{'_id': str(i), 'n': i} for i in range(4)]
+    res = DocTools.from_es(fake_es).bulk('idx', actions, check_index_existed=False, sink=sink, **kwargs)
+    return res, failures
+
+
+def test_failures_paired_with_their_actions(fake_es):
+    fake_es.statuses = {'2': [400]}
+    res, failures = bulk(fake_es, yield_ok=False)
+    assert res == (3, 1)
+    assert [(id, item['index']['_id']) for id, item in failures] == [('2', '2')]
+
+
+def test_failures_paired_with_their_actions_parallel(fake_es):
+    fake_es.statuses = {'2': [400]}
+    res, failures = bulk(fake_es, thread_count=2, chunk_size=1)
+    assert res == (3, 1)
+    assert [(id, item['index']['_id']) for id, item in failures] == [('2', '2')]
+
+
+def test_rejected_items_retried(fake_es):
+    fake_es.statuses = {'1': [429]}
+    res, failures = bulk(fake_es, max_retries=1, initial_backoff=0)
+    assert res == (4, 0)
+    assert [[meta['_id'] for _, meta, _ in actions] for actions in fake_es.requests] == [['0', '1', '2', '3'], ['1']]
+
+
+def test_retries_exhausted(fake_es):
+    fake_es.statuses = {'1': [429, 429]}
+    res, failures = bulk(fake_es, max_retries=1, initial_backoff=0)
+    assert res == (3, 1)
+    assert [(id, item['index']['status']) for id, item in failures] == [('1', 429)]
+
+
+def test_indices_of_actions_invalidated(fake_es):
+    doctool = DocTools.from_es(fake_es, cache=True)
+    cache = doctool.cache()
+    keys = [cache.make_key('count', index, {}) for index in ('idx', 'other')]
+    for key in keys:
+        cache.put(key, 1)
+    actions = [{'_id': '1', 'n': 1}, {'_index': 'other', '_id': '2', 'n': 2}]
+    doctool.bulk('idx', actions, check_index_existed=False, sink=BulkSink())
+    assert [cache.get(key) for key in keys] == [None, None]
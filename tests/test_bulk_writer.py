@@ -0,0 +1,61 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from elastictools.doctools import DocTools
+
+
+def test_single_write_flushed_by_age(fake_es):
+    writer = DocTools.from_es(fake_es).bulk_writer('idx', max_age=0.05, check_index_existed=False)
+    try:
+        future = writer.index({'a': 1}, id='1')
+        assert future.result(timeout=1)['index']['_id'] == '1'
+        assert len(fake_es.requests) == 1
+    finally:
+        writer.close()
+
+
+def test_flushed_by_max_actions(fake_es):
+    writer = DocTools.from_es(fake_es).bulk_writer('idx', max_actions=2, max_age=60, check_index_existed=False)
+    try:
+        futures = [writer.index({'a': i}, id=str(i)) for i in range(2)]
+        assert [f.result(timeout=1)['index']['_id'] for f in futures] == ['0', '1']
+        assert len(fake_es.requests) == 1
+    finally:
+        writer.close()
+
+
+def test_writes_to_same_id_merged(fake_es):
+    writer = DocTools.from_es(fake_es).bulk_writer('idx', max_age=60, check_index_existed=False)
+    f1 = writer.index({'a': 1, 'o': {'x': 1}}, id='1')
+    f2 = writer.update('1', doc={'o': {'y': 2}})
+    writer.close()
+    assert fake_es.requests == [[('index', {'_index': 'idx', '_type': '_doc', '_id': '1'},
+                                  {'a': 1, 'o': {'x': 1, 'y': 2}})]]
+    assert f1.result(timeout=1) == f2.result(timeout=1)
+
+
+def test_documents_serialized_by_the_client(fake_es):
+    writer = DocTools.from_es(fake_es).bulk_writer('idx', max_age=60, check_index_existed=False)
+    future = writer.index({'ts': datetime(2020, 1, 1)}, id='1')
+    writer.close()
+    assert future.result(timeout=1)['index']['_id'] == '1'
+    assert fake_es.requests[0][0][2] == {'ts': '2020-01-01T00:00:00'}
+
+
+def test_without_max_age_flushed_by_max_actions(fake_es):
+    writer = DocTools.from_es(fake_es).bulk_writer('idx', max_actions=2, max_age=None, check_index_existed=False)
+    try:
+        first = writer.index({'a': 1}, id='1')
+        time.sleep(0.1)
+        assert not first.done()
+        second = writer.index({'a': 2}, id='2')
+        assert [f.result(timeout=1)['index']['_id'] for f in (first, second)] == ['1', '2']
+    finally:
+        writer.close()
+
+
+def test_invalid_max_age(fake_es):
+    with pytest.raises(ValueError):
+        DocTools.from_es(fake_es).bulk_writer('idx', max_age=0, check_index_existed=False)
@@ -0,0 +1,36 @@
+import time
+
+from elastictools.getcoalescer import GetCoalescer
+
+
+class FakeDocTools:
+    def __init__(self):
+        self.requests = []
+
+    def mget(self, index_name, ids, source=False, **kwargs):
+        self.requests.append(list(ids))
+        return [{'id': id} for id in ids]
+
+
+def test_batch_sent_after_tick():
+    doctool = FakeDocTools()
+    coalescer = GetCoalescer(doctool, 'idx', tick=0.05, check_index_existed=False)
+    futures = [coalescer.load(id) for id in ('1', '2', '1')]
+    assert [f.result(timeout=1) for f in futures] == [{'id': '1'}, {'id': '2'}, {'id': '1'}]
+    assert doctool.requests == [['1', '2']]
+    assert futures[0].result() is not futures[2].result()
+
+
+def test_timer_of_full_batch_does_not_send_next_batch():
+    doctool = FakeDocTools()
+    coalescer = GetCoalescer(doctool, 'idx', tick=0.5, max_batch_size=2, check_index_existed=False)
+    coalescer.load('1')
+    coalescer.load('2')
+    assert doctool.requests == [['1', '2']]
+    time.sleep(0.25)
+    future = coalescer.load('3')
+    # the timer of the first batch fires at 0.5s, the second batch is due at 0.75s
+    time.sleep(0.35)
+    assert not future.done()
+    assert future.result(timeout=1) == {'id': '3'}
+    assert doctool.requests == [['1', '2'], ['3']]
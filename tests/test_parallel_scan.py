@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from elastictools.doctools import DocTools, _parallel_iter
+
+
+def copy(shard, node, state='STARTED'):
+    return {'index': 'logs', 'shard': shard, 'node': node, 'primary': False, 'state': state}
+
+
+class ShardsES:
+    def __init__(self, shards):
+        self.shards = shards
+
+    def search_shards(self, index):
+        return {'shards': self.shards}
+
+
+def test_shards_assigned_to_least_loaded_started_copy():
+    shards = [
+        [copy(0, 'A'), copy(0, 'B')],
+        [copy(1, 'A'), copy(1, 'B', 'INITIALIZING'), copy(1, 'C', 'INITIALIZING')],
+        [copy(2, 'C'), copy(2, 'B')],
+        [copy(3, 'A'), copy(3, 'B')],
+    ]
+    preferences = DocTools.from_es(ShardsES(shards)).shard_preferences('logs')
+    # shard 1 has a single started copy and is assigned first, then the others go to the least loaded nodes,
+    # interleaved by node
+    assert preferences == [
+        ('logs', '_shards:1|_prefer_nodes:A', 'A'),
+        ('logs', '_shards:0|_prefer_nodes:B', 'B'),
+        ('logs', '_shards:2|_prefer_nodes:C', 'C'),
+        ('logs', '_shards:3|_prefer_nodes:A', 'A'),
+    ]
+
+
+def test_fast_worker_takes_remaining_tasks():
+    threads = {}
+
+    def make_task(i, delay):
+        def task():
+            threads[i] = threading.current_thread().name
+            time.sleep(delay)
+            yield [i]
+        return task
+
+    tasks = [make_task(0, 0.3)] + [make_task(i, 0) for i in range(1, 5)]
+    pages = list(_parallel_iter(tasks, 2))
+    assert sorted(page[0] for page in pages) == [0, 1, 2, 3, 4]
+    assert len(set(threads[i] for i in range(1, 5))) == 1
+    assert threads[0] != threads[1]
+
+
+def test_worker_exception_raised_to_consumer():
+    def fail():
+        yield [1]
+        raise ValueError('shard failed')
+
+    def ok():
+        yield [2]
+
+    with pytest.raises(ValueError, match='shard failed'):
+        list(_parallel_iter([fail, ok], 2))
+
+
+def test_early_close_stops_workers():
+    stopped = []
+
+    def endless():
+        try:
+            while True:
+                yield [1]
+        finally:
+            stopped.append(1)
+
+    pages = _parallel_iter([endless, endless], 2)
+    assert next(pages) == [1]
+    pages.close()
+    deadline = time.monotonic() + 2
+    while len(stopped) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(stopped) == 2
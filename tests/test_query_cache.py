@@ -0,0 +1,96 @@
+import time
+
+from elastictools.doctools import DocTools
+from elastictools.querycache import QueryCache
+
+
+def test_invalidated_by_write():
+    cache = QueryCache()
+    key = QueryCache.make_key('search', 'logs', {'query': {'match_all': {}}})
+    cache.put(key, {'hits': 1})
+    assert cache.get(key) == {'hits': 1}
+    cache.invalidate('logs')
+    assert cache.get(key) is None
+
+
+def test_result_read_before_concurrent_write_not_stored():
+    cache = QueryCache()
+    key = QueryCache.make_key('count', 'logs', {'query': {'match_all': {}}})
+    assert cache.get(key) is None
+    generation = cache.generation(key)
+    cache.invalidate('logs')
+    assert not cache.put(key, 1, generation)
+    assert cache.get(key) is None
+
+
+def test_write_to_other_index_does_not_drop_result():
+    cache = QueryCache()
+    key = QueryCache.make_key('count', 'logs', {})
+    generation = cache.generation(key)
+    cache.invalidate('users')
+    assert cache.put(key, 1, generation)
+
+
+def test_pattern_result_not_stored_after_any_write():
+    cache = QueryCache()
+    key = QueryCache.make_key('count', 'logs-*', {})
+    generation = cache.generation(key)
+    cache.invalidate('logs-2020')
+    assert not cache.put(key, 1, generation)
+
+
+class CountES:
+    """
+    Client whose count only sees the indexed documents after `refresh()`, like ElasticSearch
+    """
+    def __init__(self):
+        self.indices = type('Indices', (), {'exists': lambda self, index_name, **kwargs: True})()
+        self.docs = 0
+        self.visible = 0
+        self.counts = 0
+
+    def index(self, **kwargs):
+        self.docs += 1
+        return {'result': 'created'}
+
+    def count(self, **kwargs):
+        self.counts += 1
+        return {'count': self.visible}
+
+    def refresh(self):
+        self.visible = self.docs
+
+
+def test_result_not_stored_within_refresh_delay():
+    es = CountES()
+    doctool = DocTools.from_es(es, cache=QueryCache(refresh_delay=0.2))
+    doctool.index('logs', {'a': 1}, id='1')
+    assert doctool.count('logs', {}, None) == 0
+    es.refresh()
+    time.sleep(0.25)
+    assert doctool.count('logs', {}, None) == 1
+    assert doctool.count('logs', {}, None) == 1
+    assert es.counts == 2
+
+
+class SearchES:
+    def __init__(self):
+        self.indices = type('Indices', (), {'exists': lambda self, index_name, **kwargs: True})()
+        self.searches = 0
+
+    def search(self, index, body=None, **kwargs):
+        self.searches += 1
+        return {'_scroll_id': str(self.searches), 'hits': {'hits': []}}
+
+
+def test_cursor_searches_not_cached():
+    es = SearchES()
+    doctool = DocTools.from_es(es, cache=True)
+    assert doctool.search('logs', {}, scroll='1m')['_scroll_id'] == '1'
+    assert doctool.search('logs', {}, scroll='1m')['_scroll_id'] == '2'
+    doctool.search('logs', {'pit': {'id': 'x'}})
+    doctool.search('logs', {'pit': {'id': 'x'}})
+    assert es.searches == 4
+    doctool.search('logs', {})
+    doctool.search('logs', {})
+    assert es.searches == 5